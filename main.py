@@ -3,17 +3,31 @@ Paper Trading Service
 Simulated trading environment with realistic execution and fees
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Request, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import ExpiredSignatureError, JWTError, jwt
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional, Dict
+from contextlib import asynccontextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 import os
+import re
+import asyncio
 import logging
+import threading
+import numpy as np
+import orjson
+import requests
 import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from database import check_db_connection
+from price_cache import price_cache, PRICE_TTL
 from storage import StorageAdapter
 
 logger = logging.getLogger(__name__)
@@ -24,7 +38,8 @@ security = HTTPBearer(auto_error=False)
 app = FastAPI(
     title="Paper Trading Service",
     description="Simulated trading environment",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration from environment
@@ -42,11 +57,48 @@ app.add_middleware(
 # Storage adapter
 storage = StorageAdapter()
 
+# Per-user locks serializing account mutations; different users never contend.
+# Entries live only while a request holds or waits on them (see _user_lock).
+_USER_LOCKS: Dict[str, asyncio.Lock] = {}
+_USER_LOCK_REFS: Dict[str, int] = {}
+
 # Trading configuration
 SLIPPAGE_PERCENT = 0.1  # 0.1% slippage
 COMMISSION_PER_TRADE = 0.0  # $0 commission (like Robinhood)
 STARTING_CASH = 100000.0  # $100,000 starting capital
 
+# Symbol forms Yahoo accepts (AAPL, BRK.B, RDS-A, 7203.T, ES=F, EURUSD=X, ^GSPC),
+# capped at the paper_positions.ticker width; anything else is never looked up
+_TICKER_RE = re.compile(r"^[A-Z0-9^][A-Z0-9.\-=^]{0,9}$")
+
+# Yahoo Finance chart endpoint; its meta block carries the latest quote
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+
+# In-flight price lookups: ticker -> Future of the one fetch callers share.
+# Entries are removed as soon as that fetch finishes.
+_INFLIGHT: Dict[str, Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Worker pool for parallel per-ticker price lookups
+PRICE_FETCH_WORKERS = int(os.getenv("PRICE_FETCH_WORKERS", "8"))
+EXECUTOR = ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS, thread_name_prefix="price-fetch")
+
+# Shared HTTP session for Yahoo Finance: keep-alive connection pool with retries
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+})
+
 # Models
 class Order(BaseModel):
     ticker: str
@@ -55,6 +107,12 @@ class Order(BaseModel):
     quantity: float
     limitPrice: Optional[float] = None
 
+    @field_validator("ticker")
+    @classmethod
+    def normalize_ticker(cls, v: str) -> str:
+        """Store and price symbols in canonical upper case."""
+        return v.strip().upper()
+
 class OrderResponse(BaseModel):
     orderId: str
     status: str  # "filled", "rejected"
@@ -82,47 +140,96 @@ class PaperAccount(BaseModel):
     createdAt: Optional[str] = None
 
 
+def _fetch_quote(ticker: str) -> Optional[float]:
+    """Read regularMarketPrice from the chart endpoint without building a DataFrame."""
+    resp = SESSION.get(
+        CHART_URL.format(ticker=ticker),
+        params={"range": "1d", "interval": "1d"},
+        timeout=5,
+    )
+    resp.raise_for_status()
+    meta = orjson.loads(resp.content)["chart"]["result"][0]["meta"]
+    price = meta.get("regularMarketPrice")
+    return float(price) if price else None
+
+def _fetch_price(ticker: str) -> Optional[float]:
+    """Look up a live price: chart-endpoint quote first, yfinance history as fallback."""
+    # Transient HTTP failures are retried by the SESSION adapter
+    try:
+        price = _fetch_quote(ticker)
+        if price:
+            return price
+    except Exception as e:
+        logger.warning(f"Quote lookup failed for {ticker}: {e}")
+
+    try:
+        stock = yf.Ticker(ticker, session=SESSION)
+        for period in ("1d", "5d"):
+            data = stock.history(period=period)
+            if not data.empty:
+                return float(data['Close'].iloc[-1])
+    except Exception as e:
+        logger.warning(f"Error fetching price for {ticker}: {e}")
+    return None
+
 def get_current_price(ticker: str) -> float:
-    """Get current stock price with write-through cache and retry."""
-    import time
-    from price_cache import price_cache, PRICE_TTL
+    """Get current stock price with write-through cache and stale fallback."""
+    # Positions stored before symbols were normalized may be lower case
+    ticker = ticker.strip().upper()
+    if not _TICKER_RE.match(ticker):
+        return 0.0
 
     cache_key = f"price:{ticker}"
     cached, is_fresh = price_cache.get(cache_key)
     if cached is not None and is_fresh:
         return cached
 
-    max_retries = 3
-    for attempt in range(max_retries):
+    # Concurrent misses for one ticker share a single lookup and its outcome,
+    # success or failure
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(ticker)
+        owner = future is None
+        if owner:
+            future = _INFLIGHT[ticker] = Future()
+
+    if owner:
         try:
-            stock = yf.Ticker(ticker)
-            data = stock.history(period="1d")
-            if not data.empty:
-                price = float(data['Close'].iloc[-1])
-                price_cache.set(cache_key, price, PRICE_TTL)
-                return price
+            cached, is_fresh = price_cache.get(cache_key)
+            if cached is not None and is_fresh:
+                price = cached  # a fetch finished between our cache check and now
+            else:
+                price = _fetch_price(ticker)
+                if price is not None:
+                    price_cache.set(cache_key, price, PRICE_TTL)
+            future.set_result(price)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _INFLIGHT_LOCK:
+                del _INFLIGHT[ticker]
+    else:
+        price = future.result()
 
-            data = stock.history(period="5d")
-            if not data.empty:
-                price = float(data['Close'].iloc[-1])
-                price_cache.set(cache_key, price, PRICE_TTL)
-                return price
-
-            if attempt < max_retries - 1:
-                time.sleep(1)
-                continue
-        except Exception as e:
-            logger.warning(f"Error fetching price for {ticker} (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(1)
-
-    # All retries failed — serve stale cache
+    if price is not None:
+        return price
+
+    # Fetch failed — serve stale cache
     stale = price_cache.get_stale(cache_key)
     if stale is not None:
         logger.info(f"Serving stale cached price for {ticker}: {stale}")
         return stale
     return 0.0
 
+async def get_current_prices(tickers: List[str]) -> Dict[str, float]:
+    """Get current prices for several tickers, looking them up in parallel."""
+    loop = asyncio.get_running_loop()
+    unique = list(dict.fromkeys(tickers))
+    prices = await asyncio.gather(
+        *(loop.run_in_executor(EXECUTOR, get_current_price, ticker) for ticker in unique)
+    )
+    return dict(zip(unique, prices))
+
 def apply_slippage(price: float, side: str) -> float:
     """Apply realistic slippage to order execution"""
     slippage = price * (SLIPPAGE_PERCENT / 100)
@@ -131,25 +238,39 @@ def apply_slippage(price: float, side: str) -> float:
     else:
         return price - slippage
 
-def calculate_account_metrics(account: Dict) -> Dict:
+async def calculate_account_metrics(account: Dict) -> Dict:
     """Calculate account metrics with current prices"""
-    total_market_value = account['cash']
     initial_value = STARTING_CASH
-
-    for position in account['positions']:
-        current_price = get_current_price(position['ticker'])
-        position['currentPrice'] = current_price
-
-        market_value = position['quantity'] * current_price
-        position['marketValue'] = market_value
-
-        cost_basis = position['quantity'] * position['avgCostBasis']
-
-        unrealized_pl = market_value - cost_basis
-        position['unrealizedPL'] = unrealized_pl
-        position['unrealizedPLPercent'] = (unrealized_pl / cost_basis * 100) if cost_basis > 0 else 0
-
-        total_market_value += market_value
+    positions = account['positions']
+    tickers = [p['ticker'] for p in positions]
+
+    prices = await get_current_prices(tickers)
+
+    # Per-position metrics computed as whole-portfolio array ops
+    n = len(positions)
+    quantities = np.fromiter((p['quantity'] for p in positions), dtype=np.float64, count=n)
+    avg_costs = np.fromiter((p['avgCostBasis'] for p in positions), dtype=np.float64, count=n)
+    current_prices = np.fromiter((prices[t] for t in tickers), dtype=np.float64, count=n)
+
+    market_values = quantities * current_prices
+    cost_bases = quantities * avg_costs
+    unrealized_pl = market_values - cost_bases
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unrealized_pl_percent = np.where(cost_bases > 0, unrealized_pl / cost_bases * 100, 0.0)
+
+    for position, price, mv, upl, upl_pct in zip(
+        positions,
+        current_prices.tolist(),
+        market_values.tolist(),
+        unrealized_pl.tolist(),
+        unrealized_pl_percent.tolist(),
+    ):
+        position['currentPrice'] = price
+        position['marketValue'] = mv
+        position['unrealizedPL'] = upl
+        position['unrealizedPLPercent'] = upl_pct
+
+    total_market_value = float(account['cash']) + float(np.vdot(quantities, current_prices))
 
     account['totalValue'] = total_market_value
     account['totalPL'] = total_market_value - initial_value
@@ -190,6 +311,20 @@ def verify_token(
         detail="Not authenticated",
     )
 
+@asynccontextmanager
+async def _user_lock(user_id: str):
+    """Hold user_id's lock; drop it once no request holds or waits on it."""
+    lock = _USER_LOCKS.setdefault(user_id, asyncio.Lock())
+    _USER_LOCK_REFS[user_id] = _USER_LOCK_REFS.get(user_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _USER_LOCK_REFS[user_id] -= 1
+        if not _USER_LOCK_REFS[user_id]:
+            del _USER_LOCK_REFS[user_id]
+            del _USER_LOCKS[user_id]
+
 # Routes
 @app.get("/")
 def read_root():
@@ -202,8 +337,6 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    from price_cache import price_cache
-    from database import check_db_connection
     return {
         "status": "healthy",
         "service": "paper-trading-service",
@@ -213,23 +346,28 @@ def health_check():
     }
 
 @app.get("/api/paper/account", response_model=PaperAccount)
-def get_account(token_data: dict = Depends(verify_token)):
+async def get_account(token_data: dict = Depends(verify_token)):
     """Get paper trading account"""
     user_id = str(token_data.get("user_id"))
-    account = storage.get_account(user_id)
-    account = calculate_account_metrics(account)
+    account = await run_in_threadpool(storage.get_account, user_id)
+    account = await calculate_account_metrics(account)
     return account
 
 @app.post("/api/paper/order", response_model=OrderResponse)
-def place_order(order: Order, token_data: dict = Depends(verify_token)):
+async def place_order(order: Order, token_data: dict = Depends(verify_token)):
     """Place a paper trading order"""
     user_id = str(token_data.get("user_id"))
 
-    # Ensure account exists
-    storage.get_account(user_id)
+    # Reject malformed orders before any network I/O
+    if order.type != "market" and order.limitPrice is None:
+        return OrderResponse(
+            orderId="",
+            status="rejected",
+            message="Limit price required for limit orders"
+        )
 
-    # Get current market price
-    market_price = get_current_price(order.ticker)
+    # Get current market price (the account is created on demand by the order write)
+    market_price = await run_in_threadpool(get_current_price, order.ticker)
     if market_price == 0:
         return OrderResponse(
             orderId="",
@@ -241,12 +379,6 @@ def place_order(order: Order, token_data: dict = Depends(verify_token)):
     if order.type == "market":
         execution_price = apply_slippage(market_price, order.side)
     else:  # limit order
-        if order.limitPrice is None:
-            return OrderResponse(
-                orderId="",
-                status="rejected",
-                message="Limit price required for limit orders"
-            )
         if order.side == "buy" and order.limitPrice >= market_price:
             execution_price = order.limitPrice
         elif order.side == "sell" and order.limitPrice <= market_price:
@@ -260,15 +392,17 @@ def place_order(order: Order, token_data: dict = Depends(verify_token)):
 
     # Execute order via storage adapter
     try:
-        result = storage.place_order(
-            user_id=user_id,
-            ticker=order.ticker,
-            order_type=order.type,
-            side=order.side,
-            quantity=order.quantity,
-            execution_price=execution_price,
-            limit_price=order.limitPrice,
-        )
+        async with _user_lock(user_id):
+            result = await run_in_threadpool(
+                storage.place_order,
+                user_id=user_id,
+                ticker=order.ticker,
+                order_type=order.type,
+                side=order.side,
+                quantity=order.quantity,
+                execution_price=execution_price,
+                limit_price=order.limitPrice,
+            )
         return OrderResponse(**result)
     except ValueError as e:
         return OrderResponse(
@@ -278,17 +412,21 @@ def place_order(order: Order, token_data: dict = Depends(verify_token)):
         )
 
 @app.post("/api/paper/reset")
-def reset_account(token_data: dict = Depends(verify_token)):
+async def reset_account(token_data: dict = Depends(verify_token)):
     """Reset paper trading account to starting state"""
     user_id = str(token_data.get("user_id"))
-    result = storage.reset_account(user_id)
+    async with _user_lock(user_id):
+        result = await run_in_threadpool(storage.reset_account, user_id)
     return result
 
 @app.get("/api/paper/orders")
-def get_orders(token_data: dict = Depends(verify_token)):
-    """Get order history"""
+async def get_orders(
+    limit: Optional[int] = Query(None, ge=1),
+    token_data: dict = Depends(verify_token),
+):
+    """Get order history, newest first (optionally only the latest `limit` orders)"""
     user_id = str(token_data.get("user_id"))
-    orders = storage.get_orders(user_id)
+    orders = await run_in_threadpool(storage.get_orders, user_id, limit)
     return {"orders": orders}
 
 if __name__ == "__main__":
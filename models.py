@@ -25,10 +25,12 @@ class PaperAccountDB(Base):
     reset_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     version = Column(Integer, nullable=False, default=1)
 
+    # Loaded on access only: order placement, reset and the orders endpoint
+    # never need the full position/order collections.
     positions = relationship("PaperPositionDB", back_populates="account",
-                             cascade="all, delete-orphan", lazy="selectin")
+                             cascade="all, delete-orphan", lazy="select")
     orders = relationship("PaperOrderDB", back_populates="account",
-                          cascade="all, delete-orphan", lazy="selectin",
+                          cascade="all, delete-orphan", lazy="select",
                           order_by="PaperOrderDB.timestamp.desc()")
 
 
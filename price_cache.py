@@ -7,6 +7,9 @@ Write-through pattern:
   3. Caller writes result via set()
   4. On yfinance failure, get_stale() returns last known value
 
+Ages are measured with time.monotonic(), so wall-clock adjustments never
+extend or cut short an entry's TTL.
+
 Thread-safe via threading.Lock. No external dependencies.
 """
 
@@ -27,7 +30,7 @@ class PriceCache:
             if entry is None:
                 return None, False
             value, ts, ttl = entry
-            return value, (time.time() - ts) < ttl
+            return value, (time.monotonic() - ts) < ttl
 
     def get_stale(self, key: str) -> Optional[Any]:
         """Return cached value regardless of age. None if never cached."""
@@ -38,7 +41,7 @@ class PriceCache:
     def set(self, key: str, value: Any, ttl: float) -> None:
         """Write value with TTL in seconds."""
         with self._lock:
-            self._store[key] = (value, time.time(), ttl)
+            self._store[key] = (value, time.monotonic(), ttl)
 
     def invalidate(self, key: str) -> None:
         with self._lock:
@@ -50,7 +53,7 @@ class PriceCache:
 
     def stats(self) -> dict:
         with self._lock:
-            now = time.time()
+            now = time.monotonic()
             total = len(self._store)
             fresh = sum(1 for _, (_, ts, ttl) in self._store.items() if (now - ts) < ttl)
             return {"total_entries": total, "fresh_entries": fresh, "stale_entries": total - fresh}
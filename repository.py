@@ -7,26 +7,26 @@ from datetime import datetime, timezone
 from typing import Optional, Dict, List
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 
 from models import PaperAccountDB, PaperPositionDB, PaperOrderDB
 
 STARTING_CASH = Decimal("100000.00")
+ACCOUNT_ORDERS_LIMIT = 1000  # most recent orders embedded in the account payload
 
 
 class PaperTradingRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_account(self, user_id: int) -> Optional[PaperAccountDB]:
-        return (
-            self.db.query(PaperAccountDB)
-            .filter(PaperAccountDB.user_id == user_id)
-            .first()
-        )
+    def get_account(self, user_id: int, for_update: bool = False) -> Optional[PaperAccountDB]:
+        query = self.db.query(PaperAccountDB).filter(PaperAccountDB.user_id == user_id)
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
 
-    def get_or_create_account(self, user_id: int) -> PaperAccountDB:
-        account = self.get_account(user_id)
+    def get_or_create_account(self, user_id: int, for_update: bool = False) -> PaperAccountDB:
+        account = self.get_account(user_id, for_update=for_update)
         if account is None:
             account = PaperAccountDB(
                 user_id=user_id,
@@ -39,11 +39,12 @@ class PaperTradingRepository:
         return account
 
     def get_position(self, account_id: int, ticker: str) -> Optional[PaperPositionDB]:
+        # Case-insensitive so rows stored before tickers were normalized still match
         return (
             self.db.query(PaperPositionDB)
             .filter(and_(
                 PaperPositionDB.account_id == account_id,
-                PaperPositionDB.ticker == ticker,
+                func.upper(PaperPositionDB.ticker) == ticker.upper(),
             ))
             .first()
         )
@@ -55,7 +56,9 @@ class PaperTradingRepository:
         qty = Decimal(str(quantity))
         px = Decimal(str(execution_price))
 
-        account = self.get_or_create_account(user_id)
+        # Lock the account row first so concurrent orders for this account
+        # serialize before either reads the position or cash it will change
+        account = self.get_or_create_account(user_id, for_update=True)
         old_version = account.version
 
         if side == "buy":
@@ -65,7 +68,6 @@ class PaperTradingRepository:
 
             account.cash -= total_cost
             account.version += 1
-            self.db.flush()
 
             # Upsert position
             position = self.get_position(account.id, ticker)
@@ -93,7 +95,6 @@ class PaperTradingRepository:
             proceeds = qty * px
             account.cash += proceeds
             account.version += 1
-            self.db.flush()
 
             position.quantity -= qty
             if position.quantity == 0:
@@ -115,6 +116,7 @@ class PaperTradingRepository:
             filled_at=now,
         )
         self.db.add(order)
+        # Single flush: cash, position and order rows go out in one unit of work
         self.db.flush()
 
         return {
@@ -150,13 +152,15 @@ class PaperTradingRepository:
         self.db.flush()
         return {"message": "Account reset successfully", "startingCash": float(STARTING_CASH)}
 
-    def get_orders(self, account_id: int) -> List[PaperOrderDB]:
-        return (
+    def get_orders(self, account_id: int, limit: Optional[int] = None) -> List[PaperOrderDB]:
+        query = (
             self.db.query(PaperOrderDB)
             .filter(PaperOrderDB.account_id == account_id)
             .order_by(PaperOrderDB.timestamp.desc())
-            .all()
         )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
 
     # Format conversion
     def to_account_dict(self, account: PaperAccountDB) -> Dict:
@@ -164,7 +168,10 @@ class PaperTradingRepository:
             "userId": str(account.user_id),
             "cash": float(account.cash),
             "positions": [self._pos_to_dict(p) for p in account.positions],
-            "orders": [self._order_to_dict(o) for o in account.orders],
+            "orders": [
+                self._order_to_dict(o)
+                for o in self.get_orders(account.id, limit=ACCOUNT_ORDERS_LIMIT)
+            ],
             "createdAt": account.created_at.isoformat() if account.created_at else None,
         }
 
@@ -23,8 +23,10 @@ class StorageAdapter:
         try:
             repo = PaperTradingRepository(db)
             account = repo.get_or_create_account(self._resolve_uid(user_id))
+            # Serialize before commit so the expired instance isn't reloaded
+            result = repo.to_account_dict(account)
             db.commit()
-            return repo.to_account_dict(account)
+            return result
         except Exception as e:
             db.rollback()
             logger.error(f"PG read failed: {e}")
@@ -66,14 +68,14 @@ class StorageAdapter:
             db.close()
 
     # Orders
-    def get_orders(self, user_id: str) -> List[Dict]:
+    def get_orders(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
         db = database.SessionLocal()
         try:
             repo = PaperTradingRepository(db)
             account = repo.get_account(self._resolve_uid(user_id))
             if not account:
                 return []
-            orders = repo.get_orders(account.id)
+            orders = repo.get_orders(account.id, limit=limit)
             return [repo._order_to_dict(o) for o in orders]
         finally:
             db.close()
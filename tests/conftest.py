@@ -4,7 +4,8 @@ Shared fixtures for PaperTradingService tests.
 Key design decisions:
 - Uses SQLite in-memory database for test isolation (no JSON files).
 - Generates real JWTs matching the production auth dependency.
-- yfinance is patched globally so no network calls happen.
+- Yahoo's chart endpoint and yfinance are patched globally so no network
+  calls happen.
 - price_cache is a stub that always reports a cache miss.
 """
 
@@ -14,8 +15,10 @@ from decimal import Decimal
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
+import orjson
 import pandas as pd
 import pytest
+import requests
 from fastapi.testclient import TestClient
 from jose import jwt
 
@@ -32,8 +35,9 @@ if _SERVICE_DIR not in sys.path:
 # ---------------------------------------------------------------------------
 # Inject a mock 'price_cache' module into sys.modules BEFORE importing
 # papertradingservice.main.  The real price_cache is a sibling module that
-# isn't on sys.path during testing, so the lazy import inside
-# get_current_price (``from price_cache import ...``) would fail.
+# isn't on sys.path during testing, so main's module-level
+# ``from price_cache import ...`` would fail.  Tests that need a different
+# cache patch ``papertradingservice.main.price_cache``.
 # ---------------------------------------------------------------------------
 import types as _types
 
@@ -107,7 +111,7 @@ TEST_JWT_SECRET = os.environ["JWT_SECRET_KEY"]
 TEST_JWT_ALGORITHM = os.environ["JWT_ALGORITHM"]
 
 
-def _make_yf_ticker(ticker_symbol: str):
+def _make_yf_ticker(ticker_symbol: str, **kwargs):
     """Return a fake yf.Ticker whose .history() yields our mock prices."""
     price = MOCK_PRICES.get(ticker_symbol, DEFAULT_MOCK_PRICE)
     mock_ticker = MagicMock()
@@ -116,6 +120,27 @@ def _make_yf_ticker(ticker_symbol: str):
     return mock_ticker
 
 
+def _fake_session_get(url, *args, **kwargs):
+    """
+    Fake requests.Session.get for Yahoo's chart endpoint.
+
+    Tickers in MOCK_PRICES get a quote; anything else gets a 404 like the
+    real endpoint, so those lookups fall through to the yfinance mocks.
+    """
+    ticker = url.rsplit("/", 1)[-1]
+    resp = MagicMock()
+    if ticker in MOCK_PRICES:
+        resp.content = orjson.dumps({
+            "chart": {
+                "result": [{"meta": {"symbol": ticker, "regularMarketPrice": MOCK_PRICES[ticker]}}],
+                "error": None,
+            }
+        })
+    else:
+        resp.raise_for_status.side_effect = requests.HTTPError("404 Client Error: Not Found")
+    return resp
+
+
 # ---------------------------------------------------------------------------
 # Fixtures
 # ---------------------------------------------------------------------------
@@ -128,6 +153,13 @@ def setup_database():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def _patch_quote_endpoint():
+    """Globally patch HTTP GETs so the chart endpoint never hits the network."""
+    with patch("requests.Session.get", side_effect=_fake_session_get):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def _patch_yfinance():
     """Globally patch yfinance.Ticker for every test."""
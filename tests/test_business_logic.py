@@ -162,3 +162,17 @@ def test_order_history_records_execution_details(client, seeded_account):
     assert last["status"] == "filled"
     assert last["filledPrice"] == pytest.approx(415.0 * 1.001)
     assert "timestamp" in last
+
+
+# ------------------------------------------------------------------
+# Account metrics
+# ------------------------------------------------------------------
+
+def test_unrealized_pl_metrics(client, account_with_position):
+    """10 AAPL bought at 225, marked at 230 -> +$50 / +2.22%."""
+    acct = client.get("/api/paper/account").json()
+    pos = acct["positions"][0]
+    assert pos["marketValue"] == pytest.approx(2300.0)
+    assert pos["unrealizedPL"] == pytest.approx(50.0)
+    assert pos["unrealizedPLPercent"] == pytest.approx(50.0 / 2250.0 * 100)
+    assert acct["totalPL"] == pytest.approx(50.0)
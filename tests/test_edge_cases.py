@@ -2,6 +2,8 @@
 Edge-case and integration-style tests for PaperTradingService.
 """
 
+import asyncio
+
 import pytest
 import pandas as pd
 from unittest.mock import patch, MagicMock
@@ -167,6 +169,18 @@ def test_limit_order_without_limit_price(client, seeded_account):
     assert "Limit price required" in body["message"]
 
 
+def test_limit_order_without_limit_price_skips_price_fetch(client, seeded_account):
+    """A limit order missing limitPrice is rejected without a price lookup."""
+    with patch("papertradingservice.main.get_current_price") as lookup:
+        resp = client.post("/api/paper/order", json={
+            "ticker": "AAPL", "type": "limit", "side": "buy", "quantity": 1,
+        })
+    lookup.assert_not_called()
+    body = resp.json()
+    assert body["status"] == "rejected"
+    assert "Limit price required" in body["message"]
+
+
 def test_sell_ticker_not_in_positions(client, seeded_account):
     """Selling a ticker not held returns 'No position to sell'."""
     resp = client.post("/api/paper/order", json={
@@ -186,10 +200,6 @@ def test_orders_endpoint_nonexistent_user(client):
 
 def test_get_current_price_fresh_cache_hit(client, seeded_account):
     """When cache returns a fresh value, yfinance is not called."""
-    import sys
-    cache_mod = sys.modules["price_cache"]
-    original_cache = cache_mod.price_cache
-
     class _FreshCache:
         def get(self, key):
             return 999.99, True  # fresh hit
@@ -200,13 +210,10 @@ def test_get_current_price_fresh_cache_hit(client, seeded_account):
         def stats(self):
             return {}
 
-    cache_mod.price_cache = _FreshCache()
-    try:
+    with patch("papertradingservice.main.price_cache", _FreshCache()):
         from papertradingservice.main import get_current_price
         price = get_current_price("AAPL")
-        assert price == 999.99
-    finally:
-        cache_mod.price_cache = original_cache
+    assert price == 999.99
 
 
 def test_get_current_price_5d_fallback(client, seeded_account):
@@ -220,28 +227,23 @@ def test_get_current_price_5d_fallback(client, seeded_account):
 
     with patch("yfinance.Ticker", return_value=mock_ticker):
         from papertradingservice.main import get_current_price
-        price = get_current_price("TESTFALLBACK")
+        price = get_current_price("FALLBACK")
     assert price == 555.0
 
 
-def test_get_current_price_exception_with_retry(client, seeded_account):
-    """yfinance raises on all attempts, no stale cache -> 0.0."""
+def test_get_current_price_all_sources_fail(client, seeded_account):
+    """Quote lookup and yfinance history both fail, no stale cache -> 0.0."""
     mock_ticker = MagicMock()
     mock_ticker.history.side_effect = Exception("network error")
 
-    with patch("yfinance.Ticker", return_value=mock_ticker), \
-         patch("time.sleep"):  # skip actual sleep
+    with patch("yfinance.Ticker", return_value=mock_ticker):
         from papertradingservice.main import get_current_price
         price = get_current_price("BADTICKER")
     assert price == 0.0
 
 
 def test_get_current_price_stale_cache_fallback(client, seeded_account):
-    """All retries fail but stale cache exists -> returns stale value."""
-    import sys
-    cache_mod = sys.modules["price_cache"]
-    original_cache = cache_mod.price_cache
-
+    """All price sources fail but stale cache exists -> returns stale value."""
     class _StaleCache:
         def get(self, key):
             return None, False  # no fresh hit
@@ -252,18 +254,14 @@ def test_get_current_price_stale_cache_fallback(client, seeded_account):
         def stats(self):
             return {}
 
-    cache_mod.price_cache = _StaleCache()
     mock_ticker = MagicMock()
     mock_ticker.history.side_effect = Exception("network error")
 
-    try:
-        with patch("yfinance.Ticker", return_value=mock_ticker), \
-             patch("time.sleep"):
-            from papertradingservice.main import get_current_price
-            price = get_current_price("STALECACHE")
-        assert price == 777.77
-    finally:
-        cache_mod.price_cache = original_cache
+    with patch("papertradingservice.main.price_cache", _StaleCache()), \
+         patch("yfinance.Ticker", return_value=mock_ticker):
+        from papertradingservice.main import get_current_price
+        price = get_current_price("STALECACHE")
+    assert price == 777.77
 
 
 def test_main_block_guarded(client):
@@ -282,3 +280,266 @@ def test_main_block_guarded(client):
             {"__name__": "__main__", "app": mod.app},
         )
         mock_run.assert_called_once()
+
+
+def test_account_prices_skip_yfinance(client, seeded_account):
+    """Positions are priced from the chart endpoint; no pandas-backed yfinance calls."""
+    for ticker in ("AAPL", "MSFT", "GOOGL"):
+        client.post("/api/paper/order", json={
+            "ticker": ticker, "type": "market", "side": "buy", "quantity": 1,
+        })
+
+    with patch("yfinance.Ticker") as ticker_cls, patch("yfinance.download") as download:
+        acct = client.get("/api/paper/account").json()
+    ticker_cls.assert_not_called()
+    download.assert_not_called()
+
+    prices = {p["ticker"]: p["currentPrice"] for p in acct["positions"]}
+    assert prices == {"AAPL": 230.0, "MSFT": 415.0, "GOOGL": 175.0}
+
+
+def test_get_current_price_uses_shared_session(client, seeded_account):
+    """yfinance lookups reuse the pooled module-level session."""
+    from papertradingservice.main import SESSION, get_current_price
+
+    mock_ticker = MagicMock()
+    mock_ticker.history.return_value = pd.DataFrame({"Close": [123.0]})
+
+    with patch("yfinance.Ticker", return_value=mock_ticker) as ticker_cls:
+        assert get_current_price("SESSIONT") == 123.0
+    ticker_cls.assert_called_once_with("SESSIONT", session=SESSION)
+
+
+def test_get_current_price_reads_quote_endpoint(client, seeded_account):
+    """A chart-endpoint quote is used directly, without a yfinance history frame."""
+    with patch("yfinance.Ticker") as ticker_cls:
+        from papertradingservice.main import get_current_price
+        price = get_current_price("MSFT")
+    assert price == 415.0
+    ticker_cls.assert_not_called()
+
+
+def test_get_current_prices_one_lookup_per_ticker(client, seeded_account):
+    """Duplicate tickers are looked up once each through the worker pool."""
+    with patch("papertradingservice.main.get_current_price", side_effect=lambda t: float(len(t))) as lookup:
+        from papertradingservice.main import get_current_prices
+        prices = asyncio.run(get_current_prices(["AAPL", "MSFT", "AAPL", "GOOGL"]))
+    assert prices == {"AAPL": 4.0, "MSFT": 4.0, "GOOGL": 5.0}
+    assert sorted(c.args[0] for c in lookup.call_args_list) == ["AAPL", "GOOGL", "MSFT"]
+
+
+def test_account_orders_capped_but_history_complete(client, seeded_account):
+    """The account payload embeds only the newest orders; /orders has them all."""
+    for _ in range(3):
+        client.post("/api/paper/order", json={
+            "ticker": "AAPL", "type": "market", "side": "buy", "quantity": 1,
+        })
+
+    with patch("repository.ACCOUNT_ORDERS_LIMIT", 2):
+        acct = client.get("/api/paper/account").json()
+    assert [o["orderId"] for o in acct["orders"]] == ["order_3", "order_2"]
+
+    assert len(client.get("/api/paper/orders").json()["orders"]) == 3
+
+
+def test_order_executes_under_user_lock(client, seeded_account):
+    """The storage write for an order runs while that user's lock is held."""
+    import papertradingservice.main as mod
+
+    real_place_order = mod.storage.place_order
+
+    def _checked(**kwargs):
+        assert mod._USER_LOCKS[kwargs["user_id"]].locked()
+        return real_place_order(**kwargs)
+
+    with patch.object(mod.storage, "place_order", side_effect=_checked):
+        resp = client.post("/api/paper/order", json={
+            "ticker": "AAPL", "type": "market", "side": "buy", "quantity": 1,
+        })
+    assert resp.json()["status"] == "filled"
+    assert "1" not in mod._USER_LOCKS
+
+
+def test_user_lock_serializes_and_is_evicted():
+    """Same-user holders run one at a time and the lock is dropped afterwards."""
+    import papertradingservice.main as mod
+
+    events = []
+
+    async def _hold(name):
+        async with mod._user_lock("42"):
+            events.append(f"{name}-in")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}-out")
+
+    async def _run():
+        await asyncio.gather(_hold("a"), _hold("b"))
+
+    asyncio.run(_run())
+    assert events == ["a-in", "a-out", "b-in", "b-out"]
+    assert "42" not in mod._USER_LOCKS
+    assert "42" not in mod._USER_LOCK_REFS
+
+
+@pytest.mark.parametrize("ticker", ["", ".AAPL", "AAPL;DROP", "AAPL/MSFT", "WAYTOOLONGTICKER"])
+def test_get_current_price_rejects_malformed_ticker(client, seeded_account, ticker):
+    """Malformed symbols short-circuit to 0.0 without any HTTP or yfinance call."""
+    import requests
+
+    with patch.object(requests.Session, "get") as http_get, \
+         patch("yfinance.Ticker") as ticker_cls:
+        from papertradingservice.main import get_current_price
+        assert get_current_price(ticker) == 0.0
+    http_get.assert_not_called()
+    ticker_cls.assert_not_called()
+
+
+def _lookup_concurrently(ticker, fetch_result, callers=4):
+    """
+    Run get_current_price for one ticker from several threads at once.
+
+    The fake upstream fetch blocks until every caller has looked the ticker
+    up in _INFLIGHT, so all of them are guaranteed to overlap the first
+    fetch. Returns (results, fetch_calls).
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    seen = threading.Semaphore(0)
+    release = threading.Event()
+    calls = []
+
+    class _CountingInflight(dict):
+        def get(self, key, default=None):
+            value = super().get(key, default)
+            seen.release()
+            return value
+
+    def _blocking_fetch(symbol):
+        calls.append(symbol)
+        assert release.wait(timeout=5)
+        return fetch_result
+
+    inflight = _CountingInflight()
+    with patch("papertradingservice.main._INFLIGHT", inflight), \
+         patch("papertradingservice.main._fetch_price", side_effect=_blocking_fetch):
+        from papertradingservice.main import get_current_price
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            futures = [pool.submit(get_current_price, ticker) for _ in range(callers)]
+            for _ in range(callers):
+                assert seen.acquire(timeout=5)
+            release.set()
+            results = [f.result(timeout=5) for f in futures]
+
+    assert inflight == {}
+    return results, calls
+
+
+def test_concurrent_lookups_share_one_fetch(client, seeded_account):
+    """Simultaneous cache misses for one ticker trigger a single upstream fetch."""
+    results, calls = _lookup_concurrently("AAPL", 230.0)
+    assert results == [230.0] * 4
+    assert calls == ["AAPL"]
+
+
+def test_concurrent_failed_lookups_share_one_fetch(client, seeded_account):
+    """When the upstream fetch fails, waiters reuse that failure instead of retrying."""
+    results, calls = _lookup_concurrently("DOWN", None)
+    assert results == [0.0] * 4
+    assert calls == ["DOWN"]
+
+
+def test_place_order_locks_account_before_reading_position(account_with_position):
+    """The account row is selected FOR UPDATE before the position is read."""
+    from sqlalchemy import event
+    from sqlalchemy.dialects import postgresql
+    import database
+    from repository import PaperTradingRepository
+
+    db = database.SessionLocal()
+    statements = []
+
+    @event.listens_for(db, "do_orm_execute")
+    def _capture(orm_execute_state):
+        if orm_execute_state.is_select:
+            statements.append(str(orm_execute_state.statement.compile(dialect=postgresql.dialect())))
+
+    try:
+        PaperTradingRepository(db).place_order(1, "AAPL", "market", "buy", 1, 230.0)
+        db.rollback()
+    finally:
+        db.close()
+
+    account_idx = next(i for i, sql in enumerate(statements) if "FROM paper_accounts" in sql)
+    position_idx = next(i for i, sql in enumerate(statements) if "FROM paper_positions" in sql)
+    assert "FOR UPDATE" in statements[account_idx]
+    assert account_idx < position_idx
+
+
+def test_lowercase_ticker_order_stored_upper_case(client, seeded_account):
+    """Order tickers are normalized, so 'aapl' fills and is held as AAPL."""
+    resp = client.post("/api/paper/order", json={
+        "ticker": " aapl ", "type": "market", "side": "buy", "quantity": 1,
+    })
+    assert resp.json()["status"] == "filled"
+
+    acct = client.get("/api/paper/account").json()
+    assert [p["ticker"] for p in acct["positions"]] == ["AAPL"]
+    assert acct["positions"][0]["currentPrice"] == 230.0
+
+
+def test_legacy_lowercase_position_priced_and_sellable(client, seeded_account):
+    """A position stored as 'aapl' before normalization is priced and can be sold."""
+    from decimal import Decimal
+    import database
+    from models import PaperAccountDB, PaperPositionDB
+
+    db = database.SessionLocal()
+    account = db.query(PaperAccountDB).filter(PaperAccountDB.user_id == 1).one()
+    db.add(PaperPositionDB(
+        account_id=account.id, ticker="aapl",
+        quantity=Decimal("2"), avg_cost_basis=Decimal("200.00"),
+    ))
+    db.commit()
+    db.close()
+
+    acct = client.get("/api/paper/account").json()
+    assert acct["positions"][0]["currentPrice"] == 230.0
+
+    resp = client.post("/api/paper/order", json={
+        "ticker": "AAPL", "type": "market", "side": "sell", "quantity": 2,
+    })
+    assert resp.json()["status"] == "filled"
+    assert client.get("/api/paper/account").json()["positions"] == []
+
+
+@pytest.mark.parametrize("ticker", ["BRK.B", "7203.T", "0700.HK", "ES=F", "EURUSD=X", "^GSPC"])
+def test_get_current_price_accepts_yahoo_symbol_forms(client, seeded_account, ticker):
+    """Exchange-suffixed, futures, FX and index symbols are looked up normally."""
+    from papertradingservice.main import get_current_price
+    assert get_current_price(ticker) == 100.0  # DEFAULT_MOCK_PRICE via yfinance fallback
+
+
+def test_legacy_leading_digit_position_priced_and_sellable(client, seeded_account):
+    """A held position in a symbol like 7203.T is priced and can be closed."""
+    from decimal import Decimal
+    import database
+    from models import PaperAccountDB, PaperPositionDB
+
+    db = database.SessionLocal()
+    account = db.query(PaperAccountDB).filter(PaperAccountDB.user_id == 1).one()
+    db.add(PaperPositionDB(
+        account_id=account.id, ticker="7203.T",
+        quantity=Decimal("3"), avg_cost_basis=Decimal("90.00"),
+    ))
+    db.commit()
+    db.close()
+
+    acct = client.get("/api/paper/account").json()
+    assert acct["positions"][0]["currentPrice"] == 100.0
+
+    resp = client.post("/api/paper/order", json={
+        "ticker": "7203.T", "type": "market", "side": "sell", "quantity": 3,
+    })
+    assert resp.json()["status"] == "filled"
+    assert client.get("/api/paper/account").json()["positions"] == []
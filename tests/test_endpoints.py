@@ -159,6 +159,21 @@ def test_get_orders_history(client, account_with_position):
     assert body["orders"][0]["orderId"] == "order_1"
 
 
+def test_get_orders_limit_returns_newest(client, seeded_account):
+    for ticker in ("AAPL", "MSFT", "GOOGL"):
+        client.post("/api/paper/order", json={
+            "ticker": ticker, "type": "market", "side": "buy", "quantity": 1,
+        })
+    resp = client.get("/api/paper/orders", params={"limit": 2})
+    assert resp.status_code == 200
+    assert [o["ticker"] for o in resp.json()["orders"]] == ["GOOGL", "MSFT"]
+
+
+def test_get_orders_limit_must_be_positive(client):
+    resp = client.get("/api/paper/orders", params={"limit": 0})
+    assert resp.status_code == 422
+
+
 # ------------------------------------------------------------------
 # POST /api/paper/reset
 # ------------------------------------------------------------------